@@ -0,0 +1,52 @@
+"""
+BulkWriter setup shared by the pack migration and the maintenance scripts
+"""
+import logging
+import threading
+from typing import Callable, Optional
+from google.cloud.firestore_v1.bulk_writer import BulkWriter, BulkWriterOptions
+
+logger = logging.getLogger(__name__)
+
+MAX_WRITE_ATTEMPTS = 5
+
+def create_bulk_writer(
+    db,
+    written: list,
+    max_ops_per_second: Optional[int] = None,
+    on_written: Optional[Callable[[int], None]] = None
+) -> BulkWriter:
+    """
+    Create a BulkWriter on the sync client db that retries failed writes and appends each written reference to written
+    
+    Writes lost to a failed RPC reach neither callback, so callers count
+    successes from written rather than subtracting the reported errors.
+    on_written, if given, is called with the number of references written so far.
+    """
+    options = BulkWriterOptions(max_ops_per_second=max_ops_per_second) if max_ops_per_second else None
+    writer = db.bulk_writer(options=options)
+    lock = threading.Lock()
+    
+    def on_write_result(reference, result, bulk_writer):
+        with lock:
+            written.append(reference)
+            count = len(written)
+        if on_written:
+            on_written(count)
+    
+    def on_write_error(error, bulk_writer):
+        if error.attempts < MAX_WRITE_ATTEMPTS:
+            return True
+        logger.error("Failed to write %s: %s", error.operation.reference.path, error.message)
+        return False
+    
+    writer.on_write_result(on_write_result)
+    writer.on_write_error(on_write_error)
+    return writer
+
+def close_bulk_writer(writer: BulkWriter) -> None:
+    """Wait for every queued write, including retries, then close the writer"""
+    # Retries are re-queued through create()/update(), which a closed writer
+    # rejects, so drain everything with flush() before closing
+    writer.flush()
+    writer.close()
@@ -1,45 +1,65 @@
 import os
 import json
+import logging
+import functools
+import threading
 import firebase_admin
-from firebase_admin import credentials, firestore
+from firebase_admin import credentials, firestore, firestore_async
 from typing import Optional
 
+logger = logging.getLogger(__name__)
+
 db: Optional[firestore.Client] = None
+async_db: Optional[firestore.AsyncClient] = None
+
+_CRED_JSON = os.getenv("FIREBASE_CREDENTIALS_JSON")
+_CRED_PATH = os.getenv("FIREBASE_CREDENTIALS_PATH")
+
+_init_lock = threading.Lock()
+
+def _create_clients() -> None:
+    global db, async_db
+    db = firestore.client()
+    async_db = firestore_async.client()
 
 def initialize_firebase() -> None:
-    global db
-    
-    if firebase_admin._apps:
-        db = firestore.client()
-        return
-    
-    cred_json = os.getenv("FIREBASE_CREDENTIALS_JSON")
-    if cred_json:
-        try:
-            cred_dict = json.loads(cred_json)
-            cred = credentials.Certificate(cred_dict)
-            firebase_admin.initialize_app(cred)
-            db = firestore.client()
-            print("✅ Firebase initialized (from environment variable)")
+    with _init_lock:
+        if firebase_admin._apps:
+            _create_clients()
             return
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Invalid JSON in FIREBASE_CREDENTIALS_JSON: {str(e)}")
-    
-    cred_path = os.getenv("FIREBASE_CREDENTIALS_PATH")
-    if not cred_path or not os.path.exists(cred_path):
-        raise ValueError(
-            "Firebase credentials not found. Please set either:\n"
-            "1. FIREBASE_CREDENTIALS_JSON environment variable with the full JSON content, or\n"
-            "2. FIREBASE_CREDENTIALS_PATH environment variable pointing to your serviceAccountKey.json file"
-        )
-    
-    cred = credentials.Certificate(cred_path)
-    firebase_admin.initialize_app(cred)
-    
-    db = firestore.client()
-    print("✅ Firebase initialized (from file)")
+        
+        if _CRED_JSON:
+            try:
+                cred_dict = json.loads(_CRED_JSON)
+                cred = credentials.Certificate(cred_dict)
+                firebase_admin.initialize_app(cred)
+                _create_clients()
+                logger.info("Firebase initialized (from environment variable)")
+                return
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON in FIREBASE_CREDENTIALS_JSON: {str(e)}")
+        
+        if not _CRED_PATH or not os.path.exists(_CRED_PATH):
+            raise ValueError(
+                "Firebase credentials not found. Please set either:\n"
+                "1. FIREBASE_CREDENTIALS_JSON environment variable with the full JSON content, or\n"
+                "2. FIREBASE_CREDENTIALS_PATH environment variable pointing to your serviceAccountKey.json file"
+            )
+        
+        cred = credentials.Certificate(_CRED_PATH)
+        firebase_admin.initialize_app(cred)
+        
+        _create_clients()
+        logger.info("Firebase initialized (from file)")
 
+@functools.lru_cache(maxsize=1)
 def get_firestore_client() -> firestore.Client:
     if db is None:
         raise RuntimeError("Firebase not initialized.")
-    return db
\ No newline at end of file
+    return db
+
+@functools.lru_cache(maxsize=1)
+def get_async_firestore_client() -> firestore.AsyncClient:
+    if async_db is None:
+        raise RuntimeError("Firebase not initialized.")
+    return async_db
\ No newline at end of file
@@ -1,25 +1,32 @@
-from typing import List, Optional
-from datetime import datetime
-from pydantic import BaseModel, Field
+from typing import Literal
+from pydantic import BaseModel, ConfigDict, Field
+
+_MODEL_CONFIG = ConfigDict(extra="ignore", revalidate_instances="never", frozen=True)
 
 class EmojiBase(BaseModel):
+    model_config = _MODEL_CONFIG
+    
     emojiID: str
-    imageURL: Optional[str] = None
-    imageURLWithBackground: Optional[str] = None
-    predictionID: Optional[str] = None
+    imageURL: str | None = None
+    imageURLWithBackground: str | None = None
+    predictionID: str | None = None
     prompt: str
     userID: str
-    visibility: str = "Public"
+    visibility: Literal["Public", "Private"] = "Public"
     createdAt: int
     downloadCount: int = 0
-    category: Optional[str] = None
+    category: str | None = None
 
 class EmojiListResponse(BaseModel):
-    emojis: List[EmojiBase]
-    next_cursor: Optional[str] = None
+    model_config = _MODEL_CONFIG
+    
+    emojis: list[EmojiBase]
+    next_cursor: str | None = None
     has_more: bool = False
 
 class Pack(BaseModel):
+    model_config = _MODEL_CONFIG
+    
     name: str
     url: str
     downloadCount: int
@@ -30,11 +37,15 @@ class Pack(BaseModel):
     userID: str
 
 class PackListResponse(BaseModel):
-    packs: List[Pack]
-    next_cursor: Optional[str] = None
+    model_config = _MODEL_CONFIG
+    
+    packs: list[Pack]
+    next_cursor: str | None = None
     has_more: bool = False
 
 class PackMigrationData(BaseModel):
+    model_config = _MODEL_CONFIG
+    
     id: int = Field(..., description="Original pack ID")
     name: str = Field(..., description="Pack name")
     url: str = Field(..., description="Pack URL")
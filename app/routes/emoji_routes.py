@@ -1,36 +1,63 @@
 from typing import Optional
-from fastapi import APIRouter, HTTPException, Query, Path
-from pydantic import BaseModel, Field
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Path
+from pydantic import BaseModel
 
-from ..services.firebase_service import FirebaseService
+from ..services.firebase_service import FirebaseService, get_firebase_service
 from ..models import EmojiListResponse
+from ..search_tokens import normalize_search_query
+from .etag import etag_response
+from .streaming import ndjson_response
 
 router = APIRouter()
-firebase_service = FirebaseService()
 
-@router.get("/", response_model=EmojiListResponse)
+@router.get("/", responses={200: {"model": EmojiListResponse}})
 async def list_emojis(
-    query: Optional[str] = Query(None, description="Text to search in the prompt field"),
+    request: Request,
+    query: Optional[str] = Query(None, description="Words that must all appear in the prompt field (words of 3+ characters also match as prefixes)"),
     limit: int = Query(20, ge=1, le=100, description="Number of records per page"),
-    cursor: Optional[str] = Query(None, description="Cursor for pagination (createdAt timestamp)"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor for pagination (next_cursor from the previous page)"),
     visibility: Optional[str] = Query(None, description="Filter by visibility (Public/Private)"),
     user_id: Optional[str] = Query(None, description="Filter by specific user ID. If not provided, fetches emojis from all users"),
-    category: Optional[str] = Query(None, description="Filter by category (Animals, Celebrities, Memes, Food, Emotions)")
+    category: Optional[str] = Query(None, description="Filter by category (Animals, Celebrities, Memes, Food, Emotions)"),
+    service: FirebaseService = Depends(get_firebase_service)
 ):
     """List emojis by category, ordered by creation date"""
     try:
-        result = await firebase_service.list_user_emojis(
-            query=query,
+        result = await service.list_user_emojis(
+            query=normalize_search_query(query),
             limit=limit,
             cursor=cursor,
             visibility=visibility,
             user_id=user_id,
             category=category
         )
-        return EmojiListResponse(**result)
+        return etag_response(request, result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to list emojis: {str(e)}")
 
+@router.get("/stream")
+async def stream_emojis(
+    query: Optional[str] = Query(None, description="Words that must all appear in the prompt field (words of 3+ characters also match as prefixes)"),
+    limit: int = Query(20, ge=1, le=100, description="Number of records per page"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor for pagination (next_cursor from the previous page)"),
+    visibility: Optional[str] = Query(None, description="Filter by visibility (Public/Private)"),
+    user_id: Optional[str] = Query(None, description="Filter by specific user ID. If not provided, fetches emojis from all users"),
+    category: Optional[str] = Query(None, description="Filter by category (Animals, Celebrities, Memes, Food, Emotions)"),
+    service: FirebaseService = Depends(get_firebase_service)
+):
+    """Stream emojis as NDJSON, one emoji per line, followed by a next_cursor/has_more line"""
+    try:
+        return await ndjson_response(service.stream_user_emojis(
+            query=normalize_search_query(query),
+            limit=limit,
+            cursor=cursor,
+            visibility=visibility,
+            user_id=user_id,
+            category=category
+        ))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to stream emojis: {str(e)}")
+
 class DownloadResponse(BaseModel):
     success: bool
     emojiID: str
@@ -58,12 +85,13 @@ class VisibilityResponse(BaseModel):
 @router.post("/{user_id}/{emoji_id}/download", response_model=DownloadResponse)
 async def increment_download_count(
     user_id: str = Path(..., description="User ID who owns the emoji"),
-    emoji_id: str = Path(..., description="Emoji ID to increment download count for")
+    emoji_id: str = Path(..., description="Emoji ID to increment download count for"),
+    service: FirebaseService = Depends(get_firebase_service)
 ):
     """Increment download count for an emoji"""
     try:
-        result = await firebase_service.increment_emoji_download_count(user_id, emoji_id)
-        return DownloadResponse(**result)
+        result = await service.increment_emoji_download_count(user_id, emoji_id)
+        return result
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
@@ -72,49 +100,55 @@ async def increment_download_count(
 @router.post("/{user_id}/{emoji_id}/categorize", response_model=CategorizeResponse)
 async def categorize_emoji(
     user_id: str = Path(..., description="User ID who owns the emoji"),
-    emoji_id: str = Path(..., description="Emoji ID to categorize")
+    emoji_id: str = Path(..., description="Emoji ID to categorize"),
+    service: FirebaseService = Depends(get_firebase_service)
 ):
     """Categorize an emoji using AI"""
     try:
-        result = await firebase_service.categorize_emoji(user_id, emoji_id)
-        return CategorizeResponse(**result)
+        result = await service.categorize_emoji(user_id, emoji_id)
+        return result
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to categorize emoji: {str(e)}")
 
 @router.put("/visibility", response_model=VisibilityResponse)
-async def update_emoji_visibility(request: VisibilityUpdateRequest):
+async def update_emoji_visibility(
+    request: VisibilityUpdateRequest,
+    service: FirebaseService = Depends(get_firebase_service)
+):
     """Update emoji visibility between Public and Private"""
     try:
-        result = await firebase_service.update_emoji_visibility(
+        result = await service.update_emoji_visibility(
             request.user_id, 
             request.emoji_id, 
             request.visibility
         )
-        return VisibilityResponse(**result)
+        return result
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to update visibility: {str(e)}")
 
-@router.get("/popular", response_model=EmojiListResponse)
+@router.get("/popular", responses={200: {"model": EmojiListResponse}})
 async def list_popular_emojis(
-    query: Optional[str] = Query(None, description="Text to search in the prompt field"),
+    request: Request,
+    query: Optional[str] = Query(None, description="Words that must all appear in the prompt field (words of 3+ characters also match as prefixes)"),
     limit: int = Query(20, ge=1, le=100, description="Number of records per page"),
-    cursor: Optional[str] = Query(None, description="Cursor for pagination (combination of popularity and createdAt timestamp)"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor for pagination (next_cursor from the previous page)"),
     visibility: Optional[str] = Query(None, description="Filter by visibility (Public/Private)"),
-    user_id: Optional[str] = Query(None, description="Filter by specific user ID. If not provided, fetches emojis from all users")
+    user_id: Optional[str] = Query(None, description="Filter by specific user ID. If not provided, fetches emojis from all users"),
+    service: FirebaseService = Depends(get_firebase_service)
 ):
     """List emojis by popularity (downloadCount), ordered by download count and creation date"""
     try:
-        result = await firebase_service.list_popular_emojis(
-            query=query,
+        result = await service.list_popular_emojis(
+            query=normalize_search_query(query),
             limit=limit,
             cursor=cursor,
             visibility=visibility,
             user_id=user_id
         )
-        return EmojiListResponse(**result)
+        return etag_response(request, result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to list popular emojis: {str(e)}")
\ No newline at end of file
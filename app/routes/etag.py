@@ -0,0 +1,28 @@
+"""
+ETag helpers for list routes
+"""
+import hashlib
+from typing import Any, Dict
+import orjson
+from fastapi import Request, Response
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+def etag_response(request: Request, result: Dict[str, Any]) -> Response:
+    """
+    Serialize result as JSON tagged with an ETag of its body
+
+    Answers 304 Not Modified without a body when the request's If-None-Match
+    already names that ETag.
+    """
+    body = orjson.dumps(result)
+    etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    return Response(body, media_type="application/json", headers={"ETag": etag})
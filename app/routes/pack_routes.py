@@ -2,29 +2,52 @@
 Pack API routes
 """
 from typing import Optional
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 
-from ..services.firebase_service import FirebaseService
+from ..services.firebase_service import FirebaseService, get_firebase_service
 from ..models import PackListResponse
+from ..search_tokens import normalize_search_query
+from .etag import etag_response
+from .streaming import ndjson_response
 
 router = APIRouter()
-firebase_service = FirebaseService()
 
-@router.get("/", response_model=PackListResponse)
+@router.get("/", responses={200: {"model": PackListResponse}})
 async def list_packs(
-    query: Optional[str] = Query(None, description="Text to search in the pack name and description fields (prefix match)"),
+    request: Request,
+    query: Optional[str] = Query(None, description="Words that must all appear in the pack name or description (words of 3+ characters also match as prefixes)"),
     limit: int = Query(20, ge=1, le=100, description="Number of records per page"),
-    cursor: Optional[int] = Query(None, description="Cursor for pagination (createdAt timestamp)"),
-    user_id: Optional[str] = Query(None, description="Filter by specific user ID. If not provided, fetches packs from all users")
+    cursor: Optional[str] = Query(None, description="Opaque cursor for pagination (next_cursor from the previous page)"),
+    user_id: Optional[str] = Query(None, description="Filter by specific user ID. If not provided, fetches packs from all users"),
+    service: FirebaseService = Depends(get_firebase_service)
 ):
     """List packs with pagination and search"""
     try:
-        result = await firebase_service.list_user_packs(
-            query=query,
+        result = await service.list_user_packs(
+            query=normalize_search_query(query),
             limit=limit,
             cursor=cursor,
             user_id=user_id
         )
-        return PackListResponse(**result)
+        return etag_response(request, result)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to list packs: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to list packs: {str(e)}")
+
+@router.get("/stream")
+async def stream_packs(
+    query: Optional[str] = Query(None, description="Words that must all appear in the pack name or description (words of 3+ characters also match as prefixes)"),
+    limit: int = Query(20, ge=1, le=100, description="Number of records per page"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor for pagination (next_cursor from the previous page)"),
+    user_id: Optional[str] = Query(None, description="Filter by specific user ID. If not provided, fetches packs from all users"),
+    service: FirebaseService = Depends(get_firebase_service)
+):
+    """Stream packs as NDJSON, one pack per line, followed by a next_cursor/has_more line"""
+    try:
+        return await ndjson_response(service.stream_user_packs(
+            query=normalize_search_query(query),
+            limit=limit,
+            cursor=cursor,
+            user_id=user_id
+        ))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to stream packs: {str(e)}")
\ No newline at end of file
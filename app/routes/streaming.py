@@ -0,0 +1,22 @@
+"""
+NDJSON streaming helpers for list routes
+"""
+from typing import Any, AsyncIterator, Dict
+import orjson
+from fastapi.responses import StreamingResponse
+
+async def ndjson_response(rows: AsyncIterator[Dict[str, Any]]) -> StreamingResponse:
+    """
+    Wrap rows in an NDJSON StreamingResponse
+    
+    The first row is awaited before the response starts, so query errors still
+    surface as HTTP errors instead of a truncated stream.
+    """
+    first = await anext(rows)
+    
+    async def body():
+        yield orjson.dumps(first) + b"\n"
+        async for row in rows:
+            yield orjson.dumps(row) + b"\n"
+    
+    return StreamingResponse(body(), media_type="application/x-ndjson")
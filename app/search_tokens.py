@@ -0,0 +1,37 @@
+"""
+Search token helpers for array_contains lookups on emojis and packs
+"""
+from typing import Optional
+
+MAX_SEARCH_WORDS = 20
+MIN_PREFIX_LENGTH = 3
+
+def build_search_tokens(*texts: Optional[str]) -> list[str]:
+    """Lowercased unique words of the given texts and their prefixes of MIN_PREFIX_LENGTH or more characters"""
+    words = (word.lower() for text in texts if text for word in text.split())
+    tokens = {}
+    for word in list(dict.fromkeys(words))[:MAX_SEARCH_WORDS]:
+        tokens.update(dict.fromkeys(word[:end] for end in range(MIN_PREFIX_LENGTH, len(word))))
+        tokens[word] = None
+    return list(tokens)
+
+def normalize_search_query(query: Optional[str]) -> Optional[str]:
+    """Search query stripped of surrounding whitespace, or None if it is blank"""
+    return query.strip() or None if query else None
+
+def search_words(query: str) -> list[str]:
+    """Lowercased words of a search query"""
+    return query.lower().split()
+
+def search_token_for_query(query: str) -> str:
+    """Token a search query is matched against (its longest, most selective word, lowercased)"""
+    return max(search_words(query), key=len, default="")
+
+def matches_search_word(text_word: str, word: str) -> bool:
+    """Whether a query word matches a text word the way searchTokens does (whole word, or prefix of MIN_PREFIX_LENGTH or more)"""
+    return text_word == word or (len(word) >= MIN_PREFIX_LENGTH and text_word.startswith(word))
+
+def matches_search_words(words: list[str], *texts: Optional[str]) -> bool:
+    """Whether every query word matches some word in the given texts"""
+    text_words = [word.lower() for text in texts if text for word in text.split()]
+    return all(any(matches_search_word(text_word, word) for text_word in text_words) for word in words)
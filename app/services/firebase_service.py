@@ -1,16 +1,276 @@
-from typing import List, Optional, Dict, Any
+import asyncio
+import base64
+import functools
+import logging
+import threading
+from collections import defaultdict
+from typing import Optional, Dict, Any, AsyncIterator, DefaultDict, Tuple
+import orjson
+from cachetools import LRUCache, TTLCache
+from google.api_core.exceptions import NotFound
 from google.cloud import firestore
-from google.cloud.firestore import FieldFilter, Or, And
+from google.cloud.firestore import FieldFilter
 
-from ..firebase_config import get_firestore_client
+from ..firebase_config import get_async_firestore_client
 from ..models import EmojiBase, Pack
-from .gemini_service import GeminiService
+from ..search_tokens import build_search_tokens, matches_search_words, search_token_for_query, search_words
+from .gemini_service import category_cache_key, get_gemini_service
+
+logger = logging.getLogger(__name__)
+
+_EMOJI_DEFAULTS = {
+    name: None if field.is_required() else field.default
+    for name, field in EmojiBase.model_fields.items()
+}
+_EMOJI_DEFAULTS["predictionID"] = "legacy"
+
+_PACK_DEFAULTS = dict.fromkeys(Pack.model_fields)
+
+_EMOJI_FIELDS = list(_EMOJI_DEFAULTS)
+_PACK_FIELDS = list(_PACK_DEFAULTS)
+
+_VISIBILITIES = frozenset({"Public", "Private"})
+_VISIBILITY_MESSAGES = {visibility: f"Emoji visibility updated to {visibility}" for visibility in _VISIBILITIES}
+
+# First pages of unfiltered feeds are requested far more often than anything
+# else, so they are kept briefly in-process and dropped on any emoji write.
+_first_page_cache: TTLCache = TTLCache(maxsize=512, ttl=10)
+_first_page_lock = threading.Lock()
+
+def _get_first_page(key: tuple) -> Optional[Dict[str, Any]]:
+    with _first_page_lock:
+        return _first_page_cache.get(key)
+
+def _set_first_page(key: tuple, result: Dict[str, Any]) -> None:
+    with _first_page_lock:
+        _first_page_cache[key] = result
+
+def _clear_first_pages() -> None:
+    with _first_page_lock:
+        _first_page_cache.clear()
+
+_category_cache: LRUCache = LRUCache(maxsize=10000)
+
+# Documents a multi-word search may read for one page while its other words filter rows out
+_MAX_SEARCH_SCAN = 500
+
+_DOWNLOAD_FLUSH_INTERVAL = 1.0
+_MAX_BATCH_WRITES = 500
+
+def _encode_cursor(*values: Any) -> str:
+    return base64.urlsafe_b64encode(orjson.dumps(values)).decode()
+
+def _decode_cursor(cursor: str) -> list[Any]:
+    return orjson.loads(base64.urlsafe_b64decode(cursor))
 
 class FirebaseService:
+    _db: Optional[firestore.AsyncClient] = None
     
     def __init__(self):
-        self.db = get_firestore_client()
-        self.gemini_service = GeminiService()
+        self.db = self._get_db()
+        self.gemini_service = get_gemini_service()
+        self._pending_downloads: DefaultDict[Tuple[str, str], int] = defaultdict(int)
+        self._stored_download_counts: TTLCache = TTLCache(maxsize=10000, ttl=60)
+        self._download_flusher: Optional[asyncio.Task] = None
+    
+    @classmethod
+    def _get_db(cls) -> firestore.AsyncClient:
+        if cls._db is None:
+            cls._db = get_async_firestore_client()
+        return cls._db
+    
+    def _created_at_start(self, cursor: str) -> Dict[str, Any]:
+        if cursor.isdigit():
+            return {"createdAt": int(cursor)}
+        created_at, path = _decode_cursor(cursor)
+        return {"createdAt": created_at, "__name__": self.db.document(path)}
+    
+    def _popularity_start(self, cursor: str) -> Dict[str, Any]:
+        legacy_parts = cursor.split("_")
+        if len(legacy_parts) == 2 and all(part.isdigit() for part in legacy_parts):
+            return {"downloadCount": int(legacy_parts[0]), "createdAt": int(legacy_parts[1])}
+        if cursor.isdigit():
+            return {"createdAt": int(cursor)}
+        download_count, created_at, path = _decode_cursor(cursor)
+        return {"downloadCount": download_count, "createdAt": created_at, "__name__": self.db.document(path)}
+    
+    async def _categorize_prompt(self, prompt: str) -> str:
+        key = category_cache_key(prompt)
+        category = _category_cache.get(key)
+        if category is not None:
+            return category
+        
+        cache_ref = self.db.collection("categories_cache").document(key)
+        cached_doc = await cache_ref.get()
+        if cached_doc.exists:
+            category = cached_doc.get("category")
+        else:
+            try:
+                category = await self.gemini_service.classify_emoji_prompt(prompt)
+            except Exception as e:
+                logger.error("Error classifying prompt, defaulting to 'Emotions': %s", e)
+                return "Emotions"
+            await cache_ref.set({"category": category})
+        
+        _category_cache[key] = category
+        return category
+    
+    @functools.lru_cache(maxsize=4096)
+    def _emoji_ref(self, user_id: str, emoji_id: str) -> firestore.AsyncDocumentReference:
+        return self.db.collection("emojis").document(user_id).collection("usersEmojis").document(emoji_id)
+    
+    @functools.lru_cache(maxsize=64)
+    def _build_emoji_list_query(
+        self,
+        user_id: Optional[str],
+        visibility: Optional[str],
+        category: Optional[str],
+        query: Optional[str],
+        limit: int
+    ) -> firestore.AsyncQuery:
+        if user_id:
+            base_query = self.db.collection("emojis").document(user_id).collection("usersEmojis")
+        else:
+            base_query = self.db.collection_group("usersEmojis")
+        
+        if visibility:
+            base_query = base_query.where(filter=FieldFilter("visibility", "==", visibility))
+        
+        if category:
+            base_query = base_query.where(filter=FieldFilter("category", "==", category))
+        
+        if query:
+            base_query = base_query.where(filter=FieldFilter("searchTokens", "array_contains", search_token_for_query(query)))
+        
+        base_query = base_query.order_by("createdAt", direction=firestore.Query.DESCENDING)
+        base_query = base_query.order_by("__name__", direction=firestore.Query.DESCENDING)
+        
+        return base_query.limit(limit + 1).select(_EMOJI_FIELDS)
+    
+    @functools.lru_cache(maxsize=64)
+    def _build_pack_list_query(self, user_id: Optional[str], query: Optional[str], limit: int) -> firestore.AsyncQuery:
+        if user_id:
+            base_query = self.db.collection("packs").document(user_id).collection("userPacks")
+        else:
+            base_query = self.db.collection_group("userPacks")
+        
+        if query:
+            base_query = base_query.where(filter=FieldFilter("searchTokens", "array_contains", search_token_for_query(query)))
+        
+        base_query = base_query.order_by("createdAt", direction=firestore.Query.DESCENDING)
+        base_query = base_query.order_by("__name__", direction=firestore.Query.DESCENDING)
+        
+        return base_query.limit(limit + 1).select(_PACK_FIELDS)
+    
+    @functools.lru_cache(maxsize=64)
+    def _build_popular_emoji_query(
+        self,
+        user_id: Optional[str],
+        visibility: Optional[str],
+        query: Optional[str],
+        limit: int
+    ) -> firestore.AsyncQuery:
+        if user_id:
+            base_query = self.db.collection("emojis").document(user_id).collection("usersEmojis")
+        else:
+            base_query = self.db.collection_group("usersEmojis")
+        
+        if visibility:
+            base_query = base_query.where(filter=FieldFilter("visibility", "==", visibility))
+        
+        if query:
+            base_query = base_query.where(filter=FieldFilter("searchTokens", "array_contains", search_token_for_query(query)))
+        
+        base_query = base_query.order_by("downloadCount", direction=firestore.Query.DESCENDING)
+        base_query = base_query.order_by("createdAt", direction=firestore.Query.DESCENDING)
+        base_query = base_query.order_by("__name__", direction=firestore.Query.DESCENDING)
+        
+        return base_query.limit(limit + 1).select(_EMOJI_FIELDS)
+    
+    async def _stream_rows(
+        self,
+        base_query: firestore.AsyncQuery,
+        limit: int,
+        query: Optional[str],
+        defaults: Dict[str, Any],
+        search_fields: Tuple[str, ...],
+        cursor_fields: Tuple[str, ...]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield up to limit documents of a limit + 1 query as rows of the defaults' keys, then a final next_cursor/has_more entry
+
+        The search index matches the query's longest word, and rows whose search
+        fields lack any of the other words are skipped. Reading then continues
+        after the last document until limit rows match or the results run out, so
+        a short page still means the end, unless _MAX_SEARCH_SCAN documents were
+        read first. The cursor points at the last document read.
+        """
+        words = search_words(query) if query else []
+        count = 0
+        scanned = 0
+        has_more = False
+        last_row = None
+        last_path = None
+        page_query = base_query
+        
+        while True:
+            read = 0
+            last_doc = None
+            async for doc in page_query.stream():
+                read += 1
+                if count == limit or scanned == _MAX_SEARCH_SCAN:
+                    has_more = True
+                    continue
+                last_doc = doc
+                scanned += 1
+                doc_data = doc.to_dict()
+                created_at = doc_data.get('createdAt')
+                if created_at is not None and not isinstance(created_at, int):
+                    doc_data['createdAt'] = int(created_at.timestamp() * 1000)
+                
+                last_row = {key: doc_data.get(key, default) for key, default in defaults.items()}
+                last_path = doc.reference.path
+                if words and not matches_search_words(words, *(last_row[field] for field in search_fields)):
+                    continue
+                count += 1
+                yield last_row
+            
+            if has_more or read <= limit:
+                break
+            page_query = base_query.start_after(last_doc)
+            if count == limit or scanned == _MAX_SEARCH_SCAN:
+                # Only whether anything follows is left to find out
+                page_query = page_query.limit(1)
+        
+        if has_more:
+            next_cursor = _encode_cursor(*(last_row[field] for field in cursor_fields), last_path)
+        else:
+            next_cursor = None
+        
+        yield {
+            "next_cursor": next_cursor,
+            "has_more": has_more
+        }
+    
+    async def stream_user_emojis(
+        self, 
+        query: Optional[str] = None,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        visibility: Optional[str] = None,
+        user_id: Optional[str] = None,
+        category: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield a page of emojis as Firestore returns them, then a final next_cursor/has_more entry
+        """
+        base_query = self._build_emoji_list_query(user_id, visibility, category, query, limit)
+        
+        if cursor:
+            base_query = base_query.start_after(self._created_at_start(cursor))
+        
+        async for row in self._stream_rows(base_query, limit, query, _EMOJI_DEFAULTS, ("prompt",), ("createdAt",)):
+            yield row
     
     async def list_user_emojis(
         self, 
@@ -21,56 +281,54 @@ class FirebaseService:
         user_id: Optional[str] = None,
         category: Optional[str] = None
     ) -> Dict[str, Any]:
+        cache_key = None
+        if not cursor and not query:
+            cache_key = ("list_user_emojis", visibility, user_id, category, limit)
+            cached = _get_first_page(cache_key)
+            if cached is not None:
+                return cached
+        
         try:
-            if user_id:
-                base_query = self.db.collection("emojis").document(user_id).collection("usersEmojis")
-            else:
-                base_query = self.db.collection_group("usersEmojis")
-            
-            if visibility:
-                base_query = base_query.where(filter=FieldFilter("visibility", "==", visibility))
-            
-            if category:
-                base_query = base_query.where(filter=FieldFilter("category", "==", category))
-            
-            if query:
-                base_query = base_query.where(filter=FieldFilter("prompt", ">=", query)).where(filter=FieldFilter("prompt", "<=", query + "\uf8ff"))
-            
-            base_query = base_query.order_by("createdAt", direction=firestore.Query.DESCENDING)
-            
-            base_query = base_query.limit(limit)
-            
-            if cursor:
-                base_query = base_query.start_after({"createdAt": int(cursor)})
-            
-            results = base_query.stream()
-            emojis = []
-            
-            for doc in results:
-                doc_data = doc.to_dict()
-                if 'createdAt' in doc_data and hasattr(doc_data['createdAt'], 'timestamp'):
-                    doc_data['createdAt'] = int(doc_data['createdAt'].timestamp() * 1000)
-                
-                if 'predictionID' not in doc_data:
-                    doc_data['predictionID'] = 'legacy'
-                
-                emojis.append(EmojiBase(**doc_data))
-            
-            next_cursor = str(emojis[-1].createdAt) if len(emojis) == limit else None
-            has_more = len(emojis) == limit
-            
-            return {
+            emojis = [row async for row in self.stream_user_emojis(
+                query=query,
+                limit=limit,
+                cursor=cursor,
+                visibility=visibility,
+                user_id=user_id,
+                category=category
+            )]
+            page = emojis.pop()
+            
+            result = {
                 "emojis": emojis,
-                "next_cursor": next_cursor,
-                "has_more": has_more
+                **page
             }
+            if cache_key is not None:
+                _set_first_page(cache_key, result)
+            return result
             
-        except Exception as e:
-            print(f"Error in list_user_emojis: {str(e)}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            logger.exception("Error in list_user_emojis")
             raise
     
+    async def stream_user_packs(
+        self, 
+        query: Optional[str] = None,
+        limit: int = 20,
+        cursor: Optional[str] = None,  
+        user_id: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield a page of packs as Firestore returns them, then a final next_cursor/has_more entry
+        """
+        base_query = self._build_pack_list_query(user_id, query, limit)
+        
+        if cursor:
+            base_query = base_query.start_after(self._created_at_start(cursor))
+        
+        async for row in self._stream_rows(base_query, limit, query, _PACK_DEFAULTS, ("name", "description"), ("createdAt",)):
+            yield row
+    
     async def list_user_packs(
         self, 
         query: Optional[str] = None,
@@ -78,71 +336,53 @@ class FirebaseService:
         cursor: Optional[str] = None,  
         user_id: Optional[str] = None
     ) -> Dict[str, Any]:
+        cache_key = None
+        if not cursor and not query:
+            cache_key = ("list_user_packs", user_id, limit)
+            cached = _get_first_page(cache_key)
+            if cached is not None:
+                return cached
+        
         try:
-            if user_id:
-                base_query = self.db.collection("packs").document(user_id).collection("userPacks")
-            else:
-                base_query = self.db.collection_group("userPacks")
-            
-            if query:
-                base_query = base_query.where(
-                    filter=Or([
-                        And([
-                            FieldFilter("name", ">=", query),
-                            FieldFilter("name", "<=", query + "\uf8ff")
-                        ]),
-                        And([
-                            FieldFilter("description", ">=", query),
-                            FieldFilter("description", "<=", query + "\uf8ff")
-                        ])
-                    ])
-                )
-            
-            base_query = base_query.order_by("createdAt", direction=firestore.Query.DESCENDING)
-            
-            base_query = base_query.limit(limit)
-            
-            if cursor:
-                base_query = base_query.start_after({"createdAt": int(cursor)})
-            
-            results = base_query.stream()
-            packs = []
-            
-            for doc in results:
-                doc_data = doc.to_dict()
-                if 'createdAt' in doc_data and hasattr(doc_data['createdAt'], 'timestamp'):
-                    doc_data['createdAt'] = int(doc_data['createdAt'].timestamp() * 1000)
-                packs.append(Pack(**doc_data))
-            
-            next_cursor = str(packs[-1].createdAt) if len(packs) == limit else None
-            has_more = len(packs) == limit
-            
-            return {
+            packs = [row async for row in self.stream_user_packs(
+                query=query,
+                limit=limit,
+                cursor=cursor,
+                user_id=user_id
+            )]
+            page = packs.pop()
+            
+            result = {
                 "packs": packs,
-                "next_cursor": next_cursor,
-                "has_more": has_more
+                **page
             }
+            if cache_key is not None:
+                _set_first_page(cache_key, result)
+            return result
             
-        except Exception as e:
-            print(f"Error in list_user_packs: {str(e)}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            logger.exception("Error in list_user_packs")
             raise
     
     async def increment_emoji_download_count(self, user_id: str, emoji_id: str) -> Dict[str, Any]:
+        """Buffer a download; increments are written to Firestore by the flusher"""
         try:
-            doc_ref = self.db.collection("emojis").document(user_id).collection("usersEmojis").document(emoji_id)
-            
-            doc_ref.update({
-                "downloadCount": firestore.Increment(1)
-            })
+            key = (user_id, emoji_id)
+            stored_count = self._stored_download_counts.get(key)
+            if stored_count is None:
+                doc_ref = self._emoji_ref(user_id, emoji_id)
+                doc = await doc_ref.get()
+                if not doc.exists:
+                    raise ValueError(f"Emoji not found: {emoji_id}")
+                
+                stored_count = doc.to_dict().get('downloadCount', 0)
+                self._stored_download_counts[key] = stored_count
             
-            updated_doc = doc_ref.get()
-            if not updated_doc.exists:
-                raise ValueError(f"Emoji not found: {emoji_id}")
+            self._pending_downloads[key] += 1
+            if self._download_flusher is None or self._download_flusher.done():
+                self._download_flusher = asyncio.create_task(self._run_download_flusher())
             
-            doc_data = updated_doc.to_dict()
-            current_count = doc_data.get('downloadCount', 0)
+            current_count = stored_count + self._pending_downloads[key]
             
             return {
                 "success": True,
@@ -152,15 +392,71 @@ class FirebaseService:
             }
             
         except Exception as e:
-            print(f"Error incrementing download count: {str(e)}")
+            logger.error("Error incrementing download count: %s", e)
             raise
     
+    async def _run_download_flusher(self) -> None:
+        while self._pending_downloads:
+            await asyncio.sleep(_DOWNLOAD_FLUSH_INTERVAL)
+            await self.flush_download_counts()
+    
+    async def flush_download_counts(self) -> None:
+        """Write buffered download increments in WriteBatch chunks"""
+        pending, self._pending_downloads = self._pending_downloads, defaultdict(int)
+        if not pending:
+            return
+        
+        items = list(pending.items())
+        for start in range(0, len(items), _MAX_BATCH_WRITES):
+            chunk = items[start:start + _MAX_BATCH_WRITES]
+            try:
+                await self._commit_emoji_updates([
+                    (user_id, emoji_id, {"downloadCount": firestore.Increment(count)})
+                    for (user_id, emoji_id), count in chunk
+                ])
+            except Exception as e:
+                logger.error("Batched download flush failed, retrying per emoji: %s", e)
+                await asyncio.gather(*(self._flush_download_count(key, count) for key, count in chunk))
+                continue
+            
+            for key, count in chunk:
+                if key in self._stored_download_counts:
+                    self._stored_download_counts[key] += count
+        
+        _clear_first_pages()
+    
+    async def _commit_emoji_updates(self, updates: list[Tuple[str, str, Dict[str, Any]]]) -> None:
+        """Apply (user_id, emoji_id, patch) updates as one atomic WriteBatch of at most 500 writes"""
+        batch = self.db.batch()
+        for user_id, emoji_id, patch in updates:
+            doc_ref = self._emoji_ref(user_id, emoji_id)
+            batch.update(doc_ref, patch)
+        await batch.commit()
+    
+    async def _flush_download_count(self, key: Tuple[str, str], count: int) -> None:
+        user_id, emoji_id = key
+        doc_ref = self._emoji_ref(user_id, emoji_id)
+        try:
+            await doc_ref.update({
+                "downloadCount": firestore.Increment(count)
+            })
+        except NotFound:
+            logger.error("Dropping %d downloads for deleted emoji %s", count, emoji_id)
+            return
+        except Exception as e:
+            logger.error("Error flushing download count for %s, will retry: %s", emoji_id, e)
+            self._pending_downloads[key] += count
+            return
+        
+        if key in self._stored_download_counts:
+            self._stored_download_counts[key] += count
+    
     async def categorize_emoji(self, user_id: str, emoji_id: str) -> Dict[str, Any]:
         """Categorize an emoji using Gemini AI and update Firestore"""
         try:
-            doc_ref = self.db.collection("emojis").document(user_id).collection("usersEmojis").document(emoji_id)
+            doc_ref = self._emoji_ref(user_id, emoji_id)
             
-            doc = doc_ref.get()
+            doc = await doc_ref.get()
             if not doc.exists:
                 raise ValueError(f"Emoji not found: {emoji_id}")
             
@@ -169,11 +465,13 @@ class FirebaseService:
             if not prompt:
                 raise ValueError(f"No prompt found for emoji: {emoji_id}")
             
-            category = await self.gemini_service.categorize_emoji_prompt(prompt)
+            category = await self._categorize_prompt(prompt)
             
-            doc_ref.update({
-                "category": category
+            await doc_ref.update({
+                "category": category,
+                "searchTokens": build_search_tokens(prompt)
             })
+            _clear_first_pages()
             
             return {
                 "success": True,
@@ -184,36 +482,59 @@ class FirebaseService:
             }
             
         except Exception as e:
-            print(f"Error categorizing emoji: {str(e)}")
+            logger.error("Error categorizing emoji: %s", e)
             raise
     
     async def update_emoji_visibility(self, user_id: str, emoji_id: str, visibility: str) -> Dict[str, Any]:
         """Update emoji visibility (Public/Private)"""
         try:
-            if visibility not in ["Public", "Private"]:
+            if visibility not in _VISIBILITIES:
                 raise ValueError("Visibility must be 'Public' or 'Private'")
             
-            doc_ref = self.db.collection("emojis").document(user_id).collection("usersEmojis").document(emoji_id)
+            doc_ref = self._emoji_ref(user_id, emoji_id)
             
-            doc = doc_ref.get()
+            doc = await doc_ref.get()
             if not doc.exists:
                 raise ValueError(f"Emoji not found: {emoji_id}")
             
-            doc_ref.update({
+            await doc_ref.update({
                 "visibility": visibility
             })
+            _clear_first_pages()
             
             return {
                 "success": True,
                 "emojiID": emoji_id,
                 "visibility": visibility,
-                "message": f"Emoji visibility updated to {visibility}"
+                "message": _VISIBILITY_MESSAGES[visibility]
             }
             
         except Exception as e:
-            print(f"Error updating emoji visibility: {str(e)}")
+            logger.error("Error updating emoji visibility: %s", e)
             raise
     
+    async def stream_popular_emojis(
+        self, 
+        query: Optional[str] = None,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        visibility: Optional[str] = None,
+        user_id: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield a page of emojis by popularity as Firestore returns them, then a final next_cursor/has_more entry
+        """
+        base_query = self._build_popular_emoji_query(user_id, visibility, query, limit)
+        
+        if cursor:
+            try:
+                base_query = base_query.start_after(self._popularity_start(cursor))
+            except (ValueError, IndexError):
+                pass
+        
+        async for row in self._stream_rows(base_query, limit, query, _EMOJI_DEFAULTS, ("prompt",), ("downloadCount", "createdAt")):
+            yield row
+    
     async def list_popular_emojis(
         self, 
         query: Optional[str] = None,
@@ -222,67 +543,36 @@ class FirebaseService:
         visibility: Optional[str] = None,
         user_id: Optional[str] = None
     ) -> Dict[str, Any]:
+        cache_key = None
+        if not cursor and not query:
+            cache_key = ("list_popular_emojis", visibility, user_id, limit)
+            cached = _get_first_page(cache_key)
+            if cached is not None:
+                return cached
+        
         try:
-            if user_id:
-                base_query = self.db.collection("emojis").document(user_id).collection("usersEmojis")
-            else:
-                base_query = self.db.collection_group("usersEmojis")
-            
-            if visibility:
-                base_query = base_query.where(filter=FieldFilter("visibility", "==", visibility))
-            
-            if query:
-                base_query = base_query.where(filter=FieldFilter("prompt", ">=", query)).where(filter=FieldFilter("prompt", "<=", query + "\uf8ff"))
-            
-            base_query = base_query.order_by("downloadCount", direction=firestore.Query.DESCENDING)
-            base_query = base_query.order_by("createdAt", direction=firestore.Query.DESCENDING)
-            
-            base_query = base_query.limit(limit)
-            
-            if cursor:
-                try:
-                    if '_' in str(cursor):
-                        parts = str(cursor).split('_')
-                        if len(parts) == 2:
-                            cursor_download_count = int(parts[0])
-                            cursor_created_at = int(parts[1])
-                            base_query = base_query.start_after({
-                                "downloadCount": cursor_download_count,
-                                "createdAt": cursor_created_at
-                            })
-                    else:
-                        base_query = base_query.start_after({"createdAt": int(cursor)})
-                except (ValueError, IndexError):
-                    pass
-            
-            results = base_query.stream()
-            emojis = []
-            
-            for doc in results:
-                doc_data = doc.to_dict()
-                if 'createdAt' in doc_data and hasattr(doc_data['createdAt'], 'timestamp'):
-                    doc_data['createdAt'] = int(doc_data['createdAt'].timestamp() * 1000)
-                
-                if 'predictionID' not in doc_data:
-                    doc_data['predictionID'] = 'legacy'
-                
-                emojis.append(EmojiBase(**doc_data))
-            
-            if len(emojis) == limit:
-                last_emoji = emojis[-1]
-                next_cursor = f"{last_emoji.downloadCount}_{last_emoji.createdAt}"
-            else:
-                next_cursor = None
-            has_more = len(emojis) == limit
-            
-            return {
+            emojis = [row async for row in self.stream_popular_emojis(
+                query=query,
+                limit=limit,
+                cursor=cursor,
+                visibility=visibility,
+                user_id=user_id
+            )]
+            page = emojis.pop()
+            
+            result = {
                 "emojis": emojis,
-                "next_cursor": next_cursor,
-                "has_more": has_more
+                **page
             }
+            if cache_key is not None:
+                _set_first_page(cache_key, result)
+            return result
             
-        except Exception as e:
-            print(f"Error in list_popular_emojis: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            raise
\ No newline at end of file
+        except Exception:
+            logger.exception("Error in list_popular_emojis")
+            raise
+
+@functools.lru_cache(maxsize=1)
+def get_firebase_service() -> FirebaseService:
+    """Shared FirebaseService, created on first request"""
+    return FirebaseService()
\ No newline at end of file
@@ -1,10 +1,31 @@
 """
 Gemini AI service for emoji categorization
 """
+import asyncio
+import functools
+import hashlib
 import os
-from typing import Optional
 import google.generativeai as genai
 
+_CATEGORIES = frozenset({"Animals", "Celebrities", "Memes", "Food", "Emotions"})
+
+_CATEGORIZE_TEMPLATE = """Categorize this emoji description into exactly one category:
+
+Categories:
+• Animals - pets, wildlife, creatures, insects
+• Celebrities - famous people, actors, musicians, public figures
+• Memes - internet culture, viral content, popular references, funny characters
+• Food - meals, snacks, drinks, cooking, eating
+• Emotions - feelings, facial expressions, reactions, moods
+
+Description: "{prompt}"
+
+Return only the category name: Animals, Celebrities, Memes, Food, or Emotions."""
+
+def category_cache_key(prompt: str) -> str:
+    """Key under which a prompt's category is cached (hash of the normalized prompt)"""
+    return hashlib.sha1(prompt.strip().lower().encode()).hexdigest()
+
 class GeminiService:
     """Service class for Gemini AI operations"""
     
@@ -16,9 +37,9 @@ class GeminiService:
         genai.configure(api_key=api_key)
         self.model = genai.GenerativeModel('gemini-1.5-flash')
     
-    async def categorize_emoji_prompt(self, prompt: str) -> str:
+    async def classify_emoji_prompt(self, prompt: str) -> str:
         """
-        Categorize an emoji prompt using Gemini AI
+        Categorize an emoji prompt using Gemini AI, raising if the call fails
         
         Args:
             prompt: The emoji prompt text to categorize
@@ -26,25 +47,12 @@ class GeminiService:
         Returns:
             Category string: "Animals", "Celebrities", "Memes", "Food", or "Emotions"
         """
-        try:
-            ai_prompt = f"""Categorize this emoji description into exactly one category:
-
-                        Categories:
-                        • Animals - pets, wildlife, creatures, insects
-                        • Celebrities - famous people, actors, musicians, public figures  
-                        • Memes - internet culture, viral content, popular references, funny characters
-                        • Food - meals, snacks, drinks, cooking, eating
-                        • Emotions - feelings, facial expressions, reactions, moods
-
-                        Description: "{prompt}"
-
-                        Return only the category name: Animals, Celebrities, Memes, Food, or Emotions."""   
+        response = await asyncio.to_thread(self.model.generate_content, _CATEGORIZE_TEMPLATE.format(prompt=prompt))
+        category = response.text.strip()
+        
+        return category if category in _CATEGORIES else "Emotions"
 
-            response = self.model.generate_content(ai_prompt)
-            category = response.text.strip()
-            
-            categories = ["Animals", "Celebrities", "Memes", "Food", "Emotions"]
-            return category if category in categories else "Emotions"
-            
-        except Exception:
-            return "Emotions"
\ No newline at end of file
+@functools.lru_cache(maxsize=1)
+def get_gemini_service() -> GeminiService:
+    """Shared GeminiService, configured on first use"""
+    return GeminiService()
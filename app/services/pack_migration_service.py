@@ -1,58 +1,83 @@
-from typing import List
+import asyncio
+import logging
+import time
 from datetime import datetime
-from google.cloud import firestore
 
+from ..bulk_writes import close_bulk_writer, create_bulk_writer
 from ..firebase_config import get_firestore_client
-from ..models import Pack, PackMigrationData
+from ..models import PackMigrationData
+from ..search_tokens import build_search_tokens
+
+logger = logging.getLogger(__name__)
+
+# BulkWriter ramps up from 500 writes/s following Firestore's 500/50/5 rule, up to this ceiling
+_MAX_OPS_PER_SECOND = 10000
+_PROGRESS_EVERY = 500
 
 class PackMigrationService:
     
     def __init__(self):
         self.db = get_firestore_client()
     
-    async def migrate_pack_to_firestore(self, pack_data: PackMigrationData, user_id: str) -> str:
-        try:
-            created_at_dt = datetime.fromisoformat(pack_data.created_at)
-            scraped_at_dt = datetime.fromisoformat(pack_data.scraped_at)
-            created_at_ms = int(created_at_dt.timestamp() * 1000)
-            scraped_at_ms = int(scraped_at_dt.timestamp() * 1000)
-            
-            pack = Pack(
-                name=pack_data.name,
-                url=pack_data.url,
-                downloadCount=pack_data.download_count,
-                emojiCount=pack_data.emoji_count,
-                description=pack_data.description,
-                createdAt=created_at_ms,
-                scrapedAt=scraped_at_ms,
-                userID=user_id
-            )
-            
-            doc_ref = self.db.collection("packs").document(user_id).collection("userPacks").document()
-            doc_ref.set(pack.dict())
-            
-            print(f"✅ Migrated pack '{pack_data.name}' with ID: {doc_ref.id}")
-            print(f"   📊 Fields: createdAt={created_at_ms}, downloadCount={pack_data.download_count}, emojiCount={pack_data.emoji_count}")
-            return doc_ref.id
-            
-        except Exception as e:
-            print(f"❌ Error migrating pack '{pack_data.name}': {str(e)}")
-            raise
+    def build_pack_document(self, pack_data: PackMigrationData, user_id: str) -> dict:
+        created_at_dt = datetime.fromisoformat(pack_data.created_at)
+        scraped_at_dt = datetime.fromisoformat(pack_data.scraped_at)
+        created_at_ms = int(created_at_dt.timestamp() * 1000)
+        scraped_at_ms = int(scraped_at_dt.timestamp() * 1000)
+        
+        # Inputs are already validated as PackMigrationData, so build the stored
+        # document (the Pack fields plus searchTokens) directly
+        return {
+            "name": pack_data.name,
+            "url": pack_data.url,
+            "downloadCount": pack_data.download_count,
+            "emojiCount": pack_data.emoji_count,
+            "description": pack_data.description,
+            "createdAt": created_at_ms,
+            "scrapedAt": scraped_at_ms,
+            "userID": user_id,
+            "searchTokens": build_search_tokens(pack_data.name, pack_data.description)
+        }
     
-    async def migrate_packs_from_json(self, packs_data: List[PackMigrationData], user_id: str) -> List[str]:    
-        migrated_ids = []
+    def bulk_write_packs(self, writes: list[tuple], total_packs: int) -> set[str]:
+        """Create the given (doc_ref, document) pairs with a BulkWriter, returning the IDs that were written"""
+        written = []
+        started = time.monotonic()
         
-        print(f"🚀 Starting migration of {len(packs_data)} packs for user {user_id}")
+        def log_progress(count):
+            if count % _PROGRESS_EVERY == 0 or count == len(writes):
+                elapsed = time.monotonic() - started
+                logger.info(
+                    "Committed %d/%d packs (%.0f writes/s)",
+                    count, total_packs, count / elapsed if elapsed else 0.0
+                )
         
+        writer = create_bulk_writer(self.db, written, max_ops_per_second=_MAX_OPS_PER_SECOND, on_written=log_progress)
+        for doc_ref, pack_document in writes:
+            writer.create(doc_ref, pack_document)
+        close_bulk_writer(writer)
+        
+        return {reference.id for reference in written}
+    
+    async def migrate_packs_from_json(self, packs_data: list[PackMigrationData], user_id: str) -> list[str]:    
+        user_packs = self.db.collection("packs").document(user_id).collection("userPacks")
+        
+        logger.info("Starting migration of %d packs for user %s", len(packs_data), user_id)
+        
+        writes = []
         for i, pack_data in enumerate(packs_data, 1):
             try:
-                doc_id = await self.migrate_pack_to_firestore(pack_data, user_id)
-                migrated_ids.append(doc_id)
-                print(f"✅ Progress: {i}/{len(packs_data)} packs migrated")
-                
+                pack_document = self.build_pack_document(pack_data, user_id)
             except Exception as e:
-                print(f"❌ Failed to migrate pack {i}/{len(packs_data)}: {str(e)}")
+                logger.error("Failed to migrate pack %d/%d ('%s'): %s", i, len(packs_data), pack_data.name, e)
                 continue
+            
+            writes.append((user_packs.document(), pack_document))
+        
+        # BulkWriter batches, paces and retries the writes from its own threads and
+        # blocks until they finish, so drive it from a worker thread
+        written_ids = await asyncio.to_thread(self.bulk_write_packs, writes, len(packs_data))
+        migrated_ids = [doc_ref.id for doc_ref, _ in writes if doc_ref.id in written_ids]
         
-        print(f"🎉 Migration completed! Successfully migrated {len(migrated_ids)}/{len(packs_data)} packs")
-        return migrated_ids
\ No newline at end of file
+        logger.info("Migration completed! Successfully migrated %d/%d packs", len(migrated_ids), len(packs_data))
+        return migrated_ids
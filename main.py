@@ -1,18 +1,19 @@
 import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.openapi.docs import get_swagger_ui_html
+from fastapi.responses import ORJSONResponse
 from fastapi.openapi.utils import get_openapi
 from dotenv import load_dotenv
 import uvicorn
 
-from app.firebase_config import initialize_firebase
-
 load_dotenv()
 
+from app.firebase_config import initialize_firebase
+
 initialize_firebase()
 
 from app.routes import emoji_router, pack_router
+from app.services.firebase_service import get_firebase_service
 
 app = FastAPI(
     title="Gemmoji Backend API",
@@ -20,7 +21,8 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
-    openapi_url="/openapi.json"
+    openapi_url="/openapi.json",
+    default_response_class=ORJSONResponse
 )
 
 app.add_middleware(
@@ -34,6 +36,14 @@ app.add_middleware(
 app.include_router(emoji_router, prefix="/api/v1/emojis", tags=["emojis"])
 app.include_router(pack_router, prefix="/api/v1/packs", tags=["packs"])
 
+@app.on_event("startup")
+async def create_services():
+    get_firebase_service()
+
+@app.on_event("shutdown")
+async def flush_pending_writes():
+    await get_firebase_service().flush_download_counts()
+
 def custom_openapi():
     if app.openapi_schema:
         return app.openapi_schema
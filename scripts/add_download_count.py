@@ -10,11 +10,15 @@ Usage:
 
 Environment variables required:
     FIREBASE_CREDENTIALS_PATH or FIREBASE_CREDENTIALS_JSON
+
+Optional:
+    DOWNLOAD_COUNT_CONCURRENCY  number of users read in parallel (default 32)
 """
 
 import os
 import sys
 import asyncio
+import logging
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -23,190 +27,211 @@ sys.path.insert(0, str(project_root))
 
 load_dotenv()
 
+from app.bulk_writes import close_bulk_writer, create_bulk_writer
 from app.firebase_config import initialize_firebase, get_firestore_client
+from scripts.logging_config import configure_script_logging
+from scripts.executor import size_default_executor
+
+logger = logging.getLogger(__name__)
+
+USER_CONCURRENCY = int(os.getenv("DOWNLOAD_COUNT_CONCURRENCY", "32"))
+
+def has_download_count(emoji_doc) -> bool:
+    """Whether the snapshot has a downloadCount field, without decoding it into a dict"""
+    try:
+        emoji_doc.get("downloadCount")
+    except KeyError:
+        return False
+    return True
 
 async def add_download_count_with_batching(db):
     """Add downloadCount using collection group query with batching"""
     try:
-        print("Using collection group query with small batches...")
+        logger.info("Using collection group query with small batches...")
         
         total_updated = 0
         total_already_has_field = 0
         total_error_count = 0
-        batch_size = 100
+        batch_size = 500
         
-        emojis_ref = db.collection_group("usersEmojis")
+        emojis_ref = db.collection_group("usersEmojis").select(["downloadCount"])
+        written = []
+        writer = create_bulk_writer(db, written)
         
         last_doc = None
         batch_num = 1
         
         while True:
-            print(f"   Processing batch {batch_num}...")
+            logger.debug("Processing batch %d...", batch_num)
             
-            query = emojis_ref.limit(batch_size)
+            query = emojis_ref.order_by("__name__").limit(batch_size)
             if last_doc:
                 query = query.start_after(last_doc)
             
-            batch_docs = list(query.stream())
-            
-            if not batch_docs:
-                print("   No more documents to process")
-                break
-            
-            batch_updated = 0
+            batch_count = 0
+            batch_queued = 0
             batch_skipped = 0
-            batch_errors = 0
+            written_before = len(written)
             
-            for emoji_doc in batch_docs:
-                try:
-                    emoji_data = emoji_doc.to_dict()
-                    
-                    if 'downloadCount' in emoji_data:
-                        batch_skipped += 1
-                        continue
-                    
-                    emoji_doc.reference.update({
-                        "downloadCount": 0
-                    })
-                    batch_updated += 1
-                    
-                except Exception as e:
-                    batch_errors += 1
-                    print(f"Error updating emoji {emoji_doc.id}: {str(e)}")
+            for emoji_doc in query.stream():
+                batch_count += 1
+                last_doc = emoji_doc
+                if has_download_count(emoji_doc):
+                    batch_skipped += 1
                     continue
+                
+                writer.update(emoji_doc.reference, {"downloadCount": 0})
+                batch_queued += 1
+            
+            if batch_count == 0:
+                logger.info("No more documents to process")
+                break
+            
+            writer.flush()
+            batch_updated = len(written) - written_before
+            batch_errors = batch_queued - batch_updated
             
             total_updated += batch_updated
             total_already_has_field += batch_skipped
             total_error_count += batch_errors
             
-            print(f"Batch {batch_num}: Updated {batch_updated}, Skipped {batch_skipped}, Errors {batch_errors}")
+            logger.info("Batch %d: Updated %d, Skipped %d, Errors %d", batch_num, batch_updated, batch_skipped, batch_errors)
             
-            last_doc = batch_docs[-1]
             batch_num += 1
             
-            if len(batch_docs) < batch_size:
+            if batch_count < batch_size:
                 break
         
-        print("\n" + "=" * 50)
-        print("Migration Summary:")
-        print(f"   • Total batches processed: {batch_num - 1}")
-        print(f"   • Successfully updated emojis: {total_updated}")
-        print(f"   • Already had downloadCount: {total_already_has_field}")
-        print(f"   • Errors: {total_error_count}")
+        close_bulk_writer(writer)
+        
+        logger.info("=" * 50)
+        logger.info("Migration Summary:")
+        logger.info("   • Total batches processed: %d", batch_num - 1)
+        logger.info("   • Successfully updated emojis: %d", total_updated)
+        logger.info("   • Already had downloadCount: %d", total_already_has_field)
+        logger.info("   • Errors: %d", total_error_count)
         
         if total_updated > 0:
-            print(f"\nSuccessfully added downloadCount field to {total_updated} emojis!")
+            logger.info("Successfully added downloadCount field to %d emojis!", total_updated)
         else:
-            print(f"\nAll emojis already have downloadCount field!")
+            logger.info("All emojis already have downloadCount field!")
             
         return True
         
     except Exception as e:
-        print(f"Batching migration failed: {str(e)}")
+        logger.error("Batching migration failed: %s", e)
         return False
 
-async def process_user_emojis(db, user_id, updated_count, already_has_field, error_count):
-    """Process emojis for a specific user"""
+def queue_download_count_updates(writer, references):
+    """Queue downloadCount=0 updates on the writer; blocks while it waits for rate-limit tokens"""
+    for reference in references:
+        writer.update(reference, {"downloadCount": 0})
+
+async def process_user_emojis(db, writer, writer_lock, user_id):
+    """Queue downloadCount updates for a specific user's emojis on the shared writer"""
     try:
-        print(f"   Processing user: {user_id}")
+        logger.debug("Processing user: %s", user_id)
         user_emojis_ref = db.collection("emojis").document(user_id).collection("usersEmojis")
-        user_emojis = list(user_emojis_ref.stream())
+        user_emojis = await asyncio.to_thread(list, user_emojis_ref.select(["downloadCount"]).stream())
         
-        user_updated = 0
-        user_skipped = 0
-        user_errors = 0
+        missing = [emoji_doc.reference for emoji_doc in user_emojis if not has_download_count(emoji_doc)]
+        user_skipped = len(user_emojis) - len(missing)
         
-        for emoji_doc in user_emojis:
-            try:
-                emoji_data = emoji_doc.to_dict()
-                
-                if 'downloadCount' in emoji_data:
-                    user_skipped += 1
-                    continue
-                
-                emoji_doc.reference.update({
-                    "downloadCount": 0
-                })
-                user_updated += 1
-                
-            except Exception as e:
-                user_errors += 1
-                print(f"Error updating emoji {emoji_doc.id}: {str(e)}")
-                continue
+        # BulkWriter is not thread-safe, so users queue their updates one at a time,
+        # from a worker thread so its rate limiting never blocks the event loop
+        async with writer_lock:
+            await asyncio.to_thread(queue_download_count_updates, writer, missing)
         
-        print(f"User {user_id}: Updated {user_updated}, Skipped {user_skipped}, Errors {user_errors}")
-        return user_updated, user_skipped, user_errors
+        logger.debug("User %s: Queued %d, Skipped %d", user_id, len(missing), user_skipped)
+        return len(missing), user_skipped, 0
         
     except Exception as e:
-        print(f"Error processing user {user_id}: {str(e)}")
+        logger.error("Error processing user %s: %s", user_id, e)
         return 0, 0, 1
 
 async def add_download_count_to_emojis():
     """Add downloadCount field to all emojis that don't have it"""
     try:
-        print("Starting downloadCount field addition")
-        print("=" * 50)
+        logger.info("Starting downloadCount field addition")
+        logger.info("=" * 50)
         
-        print("Initializing Firebase...")
+        logger.info("Initializing Firebase...")
         initialize_firebase()
         db = get_firestore_client()
-        print("Firebase initialized successfully")
+        logger.info("Firebase initialized successfully")
         
-        print("\nGetting all users...")
+        logger.info("Getting all users...")
         users_ref = db.collection("emojis")
         all_users = list(users_ref.stream())
         
-        print(f"Found {len(all_users)} users with emojis")
+        logger.info("Found %d users with emojis", len(all_users))
         
         if len(all_users) == 0:
-            print("No users found in emojis collection. Trying collection group query with batching...")
+            logger.info("No users found in emojis collection. Trying collection group query with batching...")
             return await add_download_count_with_batching(db)
         
-        total_updated = 0
+        total_queued = 0
         total_already_has_field = 0
         total_error_count = 0
         
-        print("\nProcessing users...")
+        # One writer for every user, so all updates share a single 500/50/5 ramp-up
+        written = []
+        writer = create_bulk_writer(db, written)
+        writer_lock = asyncio.Lock()
         
-        for i, user_doc in enumerate(all_users, 1):
-            user_id = user_doc.id
-            
-            try:
-                updated, skipped, errors = await process_user_emojis(
-                    db, user_id, total_updated, total_already_has_field, total_error_count
-                )
-                
-                total_updated += updated
-                total_already_has_field += skipped
-                total_error_count += errors
-                
-                if i % 10 == 0:
-                    print(f"   Progress: {i}/{len(all_users)} users processed")
-                
-            except Exception as e:
+        logger.info("Processing users...")
+        
+        size_default_executor(USER_CONCURRENCY)
+        semaphore = asyncio.Semaphore(USER_CONCURRENCY)
+        processed = 0
+        
+        async def process_with_limit(user_id):
+            nonlocal processed
+            async with semaphore:
+                result = await process_user_emojis(db, writer, writer_lock, user_id)
+            processed += 1
+            if processed % 10 == 0:
+                logger.info("Progress: %d/%d users processed", processed, len(all_users))
+            return result
+        
+        results = await asyncio.gather(
+            *(process_with_limit(user_doc.id) for user_doc in all_users),
+            return_exceptions=True
+        )
+        
+        await asyncio.to_thread(close_bulk_writer, writer)
+        
+        for user_doc, result in zip(all_users, results):
+            if isinstance(result, Exception):
                 total_error_count += 1
-                print(f"Error processing user {user_id}: {str(e)}")
+                logger.error("Error processing user %s: %s", user_doc.id, result)
                 continue
+            
+            queued, skipped, errors = result
+            total_queued += queued
+            total_already_has_field += skipped
+            total_error_count += errors
+        
+        total_updated = len(written)
+        total_error_count += total_queued - total_updated
         
-        print("\n" + "=" * 50)
-        print("Migration Summary:")
-        print(f"   • Total users processed: {len(all_users)}")
-        print(f"   • Successfully updated emojis: {total_updated}")
-        print(f"   • Already had downloadCount: {total_already_has_field}")
-        print(f"   • Errors: {total_error_count}")
+        logger.info("=" * 50)
+        logger.info("Migration Summary:")
+        logger.info("   • Total users processed: %d", len(all_users))
+        logger.info("   • Successfully updated emojis: %d", total_updated)
+        logger.info("   • Already had downloadCount: %d", total_already_has_field)
+        logger.info("   • Errors: %d", total_error_count)
         
         if total_updated > 0:
-            print(f"\nSuccessfully added downloadCount field to {total_updated} emojis!")
+            logger.info("Successfully added downloadCount field to %d emojis!", total_updated)
         else:
-            print(f"\nAll emojis already have downloadCount field!")
+            logger.info("All emojis already have downloadCount field!")
             
     except KeyboardInterrupt:
-        print("\nOperation interrupted by user")
+        logger.warning("Operation interrupted by user")
         sys.exit(1)
     except Exception as e:
-        print(f"\nMigration failed with error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Migration failed with error: %s", e)
         sys.exit(1)
 
 async def main():
@@ -229,4 +254,5 @@ if __name__ == "__main__":
         print("   2. FIREBASE_CREDENTIALS_PATH environment variable pointing to your serviceAccountKey.json file")
         sys.exit(1)
     
+    configure_script_logging()
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Add searchTokens Field to Emojis and Packs
+
+This script backfills the searchTokens array used by the emoji and pack search
+queries (array_contains) on every existing emoji and pack document.
+
+Usage:
+    python scripts/add_search_tokens.py
+
+Environment variables required:
+    FIREBASE_CREDENTIALS_PATH or FIREBASE_CREDENTIALS_JSON
+"""
+
+import os
+import sys
+import asyncio
+import logging
+from pathlib import Path
+from dotenv import load_dotenv
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+load_dotenv()
+
+from app.firebase_config import initialize_firebase, get_async_firestore_client
+from app.search_tokens import build_search_tokens
+from scripts.logging_config import configure_script_logging
+
+logger = logging.getLogger(__name__)
+
+async def add_search_tokens_to_collection(db, collection_id, text_fields):
+    """Set searchTokens on every document of a collection group, one page of concurrent updates at a time"""
+    logger.info("Processing collection group '%s'...", collection_id)
+    
+    total_updated = 0
+    total_error_count = 0
+    batch_size = 100
+    
+    docs_ref = db.collection_group(collection_id).select(list(text_fields))
+    
+    last_doc = None
+    batch_num = 1
+    
+    while True:
+        query = docs_ref.order_by("__name__").limit(batch_size)
+        if last_doc:
+            query = query.start_after(last_doc)
+        
+        batch_docs = []
+        batch_tokens = []
+        
+        async for doc in query.stream():
+            last_doc = doc
+            data = doc.to_dict()
+            batch_docs.append(doc)
+            batch_tokens.append(build_search_tokens(*(data.get(field) for field in text_fields)))
+        
+        if not batch_docs:
+            break
+        
+        results = await asyncio.gather(
+            *(doc.reference.update({"searchTokens": tokens}) for doc, tokens in zip(batch_docs, batch_tokens)),
+            return_exceptions=True
+        )
+        
+        batch_errors = 0
+        for doc, result in zip(batch_docs, results):
+            if isinstance(result, Exception):
+                batch_errors += 1
+                logger.warning("Error updating %s document %s: %s", collection_id, doc.id, result)
+        batch_updated = len(batch_docs) - batch_errors
+        
+        total_updated += batch_updated
+        total_error_count += batch_errors
+        
+        logger.info("Batch %d: Updated %d, Errors %d", batch_num, batch_updated, batch_errors)
+        
+        batch_num += 1
+        
+        if len(batch_docs) < batch_size:
+            break
+    
+    return total_updated, total_error_count
+
+async def add_search_tokens():
+    """Backfill searchTokens on all emojis and packs"""
+    try:
+        logger.info("Starting searchTokens backfill")
+        logger.info("=" * 50)
+        
+        logger.info("Initializing Firebase...")
+        initialize_firebase()
+        db = get_async_firestore_client()
+        logger.info("Firebase initialized successfully")
+        
+        emojis_updated, emoji_errors = await add_search_tokens_to_collection(db, "usersEmojis", ("prompt",))
+        packs_updated, pack_errors = await add_search_tokens_to_collection(db, "userPacks", ("name", "description"))
+        
+        logger.info("=" * 50)
+        logger.info("Backfill Summary:")
+        logger.info("   • Emojis updated: %d", emojis_updated)
+        logger.info("   • Packs updated: %d", packs_updated)
+        logger.info("   • Errors: %d", emoji_errors + pack_errors)
+        
+    except KeyboardInterrupt:
+        logger.warning("Operation interrupted by user")
+        sys.exit(1)
+    except Exception as e:
+        logger.exception("Backfill failed with error: %s", e)
+        sys.exit(1)
+
+async def main():
+    """Main function"""
+    print("Add searchTokens Field to Emojis and Packs")
+    print("This will (re)compute searchTokens on every emoji and pack document")
+    
+    response = input("\nDo you want to proceed? (y/N): ")
+    if response.lower() not in ['y', 'yes']:
+        print("Operation cancelled by user")
+        return
+    
+    await add_search_tokens()
+
+if __name__ == "__main__":
+    if not os.getenv("FIREBASE_CREDENTIALS_JSON") and not os.getenv("FIREBASE_CREDENTIALS_PATH"):
+        print("Error: Firebase credentials not configured")
+        print("   Please set either:")
+        print("   1. FIREBASE_CREDENTIALS_JSON environment variable with the full JSON content, or")
+        print("   2. FIREBASE_CREDENTIALS_PATH environment variable pointing to your serviceAccountKey.json file")
+        sys.exit(1)
+    
+    configure_script_logging()
+    asyncio.run(main())
@@ -12,7 +12,6 @@ Environment variables required:
     FIREBASE_CREDENTIALS_PATH or FIREBASE_CREDENTIALS_JSON
 """
 
-import os
 import sys
 import asyncio
 from pathlib import Path
@@ -26,63 +25,14 @@ load_dotenv()
 
 from app.firebase_config import initialize_firebase, get_firestore_client
 
-async def count_emojis_by_user(db):
-    """Count emojis for each user individually"""
-    try:
-        print("Counting emojis by user...")
-        
-        user_counts = {}
-        total_emojis = 0
-        
-        users_ref = db.collection("emojis")
-        users = users_ref.stream()
-        
-        for user_doc in users:
-            user_id = user_doc.id
-            print(f"Counting emojis for user: {user_id}")
-            
-            user_emojis_ref = users_ref.document(user_id).collection("usersEmojis")
-            user_emoji_count = len(list(user_emojis_ref.stream()))
-            
-            user_counts[user_id] = user_emoji_count
-            total_emojis += user_emoji_count
-            
-            print(f"User {user_id}: {user_emoji_count} emojis")
-        
-        return user_counts, total_emojis
-        
-    except Exception as e:
-        print(f"Error counting emojis by user: {str(e)}")
-        raise
-
 async def count_emojis_collection_group(db):
-    """Count emojis using collection group query (faster for large datasets)"""
+    """Count emojis with a collection group count() aggregation (no documents are read)"""
     try:
-        print("Counting emojis using collection group query...")
-        
-        all_emojis_ref = db.collection_group("usersEmojis")
+        print("Counting emojis using collection group aggregation...")
         
-        total_count = 0
-        batch_size = 1000
+        total_count = db.collection_group("usersEmojis").count().get()[0][0].value
         
-        last_doc = None
-        while True:
-            query = all_emojis_ref.limit(batch_size)
-            if last_doc:
-                query = query.start_after(last_doc)
-            
-            docs = list(query.stream())
-            if not docs:
-                break
-                
-            batch_count = len(docs)
-            total_count += batch_count
-            last_doc = docs[-1]
-            
-            print(f"Processed batch: {batch_count} emojis (Total so far: {total_count})")
-            
-            if batch_count < batch_size:
-                break
+        print(f"Counted {total_count} emojis")
         
         return total_count
         
@@ -91,23 +41,24 @@ async def count_emojis_collection_group(db):
         raise
 
 async def count_emojis_with_categories(db):
-    """Count emojis and group by categories"""
+    """Count emojis and group them by user, category and visibility in a single scan"""
     try:
-        print("Counting emojis by category...")
+        print("Counting emojis by user, category and visibility...")
         
+        user_counts = defaultdict(int)
         category_counts = defaultdict(int)
         visibility_counts = defaultdict(int)
         total_with_prediction_id = 0
         total_without_prediction_id = 0
         
-        all_emojis_ref = db.collection_group("usersEmojis")
+        all_emojis_ref = db.collection_group("usersEmojis").select(["category", "visibility", "predictionID"])
         
-        batch_size = 500
+        batch_size = 1000
         last_doc = None
         total_processed = 0
         
         while True:
-            query = all_emojis_ref.limit(batch_size)
+            query = all_emojis_ref.order_by("__name__").limit(batch_size)
             if last_doc:
                 query = query.start_after(last_doc)
             
@@ -118,6 +69,8 @@ async def count_emojis_with_categories(db):
             for doc in docs:
                 data = doc.to_dict()
                 
+                user_counts[doc.reference.parent.parent.id] += 1
+                
                 category = data.get('category', 'Unknown')
                 category_counts[category] += 1
                 
@@ -138,6 +91,7 @@ async def count_emojis_with_categories(db):
                 break
         
         return {
+            'users': dict(user_counts),
             'categories': dict(category_counts),
             'visibility': dict(visibility_counts),
             'with_prediction_id': total_with_prediction_id,
@@ -194,29 +148,23 @@ async def main():
         print(" Firebase initialized successfully")
         
         print("\n" + "="*60)
-        print("METHOD 1: Detailed count by user")
+        print("METHOD 1: Count with user, category and visibility breakdown")
         print("="*60)
-        user_counts, total_by_user = await count_emojis_by_user(db)
+        category_stats = await count_emojis_with_categories(db)
         
         print("\n" + "="*60)
-        print("METHOD 2: Fast count using collection group")
+        print("METHOD 2: Fast count using collection group aggregation")
         print("="*60)
         total_collection_group = await count_emojis_collection_group(db)
         
-        print("\n" + "="*60)
-        print("METHOD 3: Count with category and visibility breakdown")
-        print("="*60)
-        category_stats = await count_emojis_with_categories(db)
-        
-        print_results(user_counts, total_by_user, category_stats)
+        print_results(category_stats['users'], category_stats['total'], category_stats)
         
-        if total_by_user == total_collection_group == category_stats['total']:
-            print(" All counting methods returned the same result!")
+        if total_collection_group == category_stats['total']:
+            print(" Both counting methods returned the same result!")
         else:
             print("Warning: Different counting methods returned different results:")
-            print(f"   By user: {total_by_user}")
             print(f"   Collection group: {total_collection_group}")
-            print(f"   With categories: {category_stats['total']}")
+            print(f"   With breakdown: {category_stats['total']}")
         
         print("\nEmoji counting completed successfully!")
         
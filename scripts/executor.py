@@ -0,0 +1,15 @@
+"""
+Thread pool sizing for the scripts' asyncio.to_thread work
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+def size_default_executor(max_workers: int) -> None:
+    """
+    Give the running loop a default executor of max_workers threads
+
+    asyncio.to_thread runs on the loop's default executor, which is capped at
+    min(32, cpu_count + 4) threads, fewer than the blocking Firestore and Gemini
+    calls the scripts keep in flight, so they size it to their own concurrency.
+    """
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=max_workers))
@@ -0,0 +1,22 @@
+"""
+Logging setup for the maintenance scripts
+"""
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+
+def configure_script_logging(level: int = logging.INFO) -> None:
+    """
+    Send log records through a queue to a background listener writing to stdout
+
+    Loggers only enqueue, so the event loop and worker threads never wait on
+    terminal I/O. The listener is stopped (and drained) at interpreter exit.
+    """
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    
+    listener = logging.handlers.QueueListener(log_queue, logging.StreamHandler(sys.stdout))
+    logging.basicConfig(level=level, format="%(message)s", handlers=[logging.handlers.QueueHandler(log_queue)])
+    listener.start()
+    atexit.register(listener.stop)
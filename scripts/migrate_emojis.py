@@ -15,12 +15,15 @@ Environment variables required:
 
 import os
 import sys
-import json
 import asyncio
+import logging
+import secrets
 import time
 from pathlib import Path
 from dotenv import load_dotenv
+import orjson
 from typing import List, Dict, Any
+from google.api_core.exceptions import Aborted, DeadlineExceeded, ResourceExhausted, ServiceUnavailable
 
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
@@ -28,49 +31,77 @@ sys.path.insert(0, str(project_root))
 load_dotenv()
 
 from app.firebase_config import initialize_firebase, get_firestore_client
-from app.services.gemini_service import GeminiService
+from app.services.gemini_service import category_cache_key, get_gemini_service
+from app.search_tokens import build_search_tokens
+from scripts.logging_config import configure_script_logging
+from scripts.write_throttle import WriteThrottle
+from scripts.executor import size_default_executor
+
+logger = logging.getLogger(__name__)
 
 FIXED_USER_ID = "gs8uhH0QtpfHDQgTa2YXf2Zdb9K2"
 DEFAULT_DOWNLOAD_COUNT = 10
 DEFAULT_VISIBILITY = "Public"
+MAX_COMMIT_ATTEMPTS = 5
+CATEGORIZE_CONCURRENCY = 20
 
 class EmojiMigrationService:
     """Service to handle emoji migration from JSON to Firestore"""
     
     def __init__(self):
         self.db = get_firestore_client()
-        self.gemini_service = GeminiService()
+        self.gemini_service = get_gemini_service()
+        self._category_tasks: Dict[str, asyncio.Task] = {}
+        self._categorize_slots = asyncio.Semaphore(CATEGORIZE_CONCURRENCY)
+        self.write_throttle = WriteThrottle()
         
     def load_emojis_from_json(self, json_file_path: str) -> List[Dict[str, Any]]:
         """Load emojis from JSON file"""
         try:
-            with open(json_file_path, 'r', encoding='utf-8') as f:
-                emojis = json.load(f)
+            emojis = orjson.loads(Path(json_file_path).read_bytes())
             
-            print(f"Loaded {len(emojis)} emojis from {json_file_path}")
+            logger.info("Loaded %d emojis from %s", len(emojis), json_file_path)
             return emojis
             
         except FileNotFoundError:
             raise ValueError(f"JSON file not found: {json_file_path}")
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             raise ValueError(f"Invalid JSON format: {str(e)}")
     
     async def categorize_emoji(self, prompt: str) -> str:
-        """Categorize emoji using Gemini AI with fallback"""
-        try:
-            category = await self.gemini_service.categorize_emoji_prompt(prompt)
+        """Categorize emoji using Gemini AI with fallback, once per normalized prompt"""
+        key = category_cache_key(prompt)
+        task = self._category_tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._categorize_uncached(key, prompt))
+            self._category_tasks[key] = task
+        return await task
+    
+    async def _categorize_uncached(self, key: str, prompt: str) -> str:
+        """Look the prompt up in the shared categories_cache collection before asking Gemini"""
+        cache_ref = self.db.collection("categories_cache").document(key)
+        async with self._categorize_slots:
+            try:
+                cached_doc = await asyncio.to_thread(cache_ref.get)
+                if cached_doc.exists:
+                    return cached_doc.get("category")
+                
+                category = await self.gemini_service.classify_emoji_prompt(prompt)
+                
+            except Exception as e:
+                logger.warning("Categorization failed for '%s': %s, defaulting to 'Emotions'", prompt, e)
+                self._category_tasks.pop(key, None)
+                return "Emotions"
+            
+            try:
+                await asyncio.to_thread(cache_ref.set, {"category": category})
+            except Exception as e:
+                logger.warning("Could not cache category for '%s': %s", prompt, e)
             return category
-        except Exception as e:
-            print(f"Categorization failed for '{prompt}': {str(e)}, defaulting to 'Emotions'")
-            return "Emotions"
     
     def generate_emoji_id(self) -> str:
-        """Generate a unique emoji ID"""
-        import secrets
-        import string
-        
-        alphabet = string.ascii_letters + string.digits
-        return ''.join(secrets.choice(alphabet) for _ in range(20))
+        """Generate a unique 20-character, URL-safe emoji ID"""
+        return secrets.token_urlsafe(15)
     
     def get_current_timestamp(self) -> int:
         """Get current timestamp in milliseconds (same format as Firestore)"""
@@ -100,6 +131,7 @@ class EmojiMigrationService:
                 "imageURLWithBackground": None,
                 "predictionID": "scraper",
                 "prompt": name,
+                "searchTokens": build_search_tokens(name),
                 "userID": FIXED_USER_ID,
                 "visibility": DEFAULT_VISIBILITY
             }
@@ -107,74 +139,102 @@ class EmojiMigrationService:
             return firestore_emoji
             
         except Exception as e:
-            print(f" Error creating Firestore emoji from {json_emoji}: {str(e)}")
+            logger.debug("Error creating Firestore emoji from %s: %s", json_emoji, e)
             raise
     
-    async def save_emoji_to_firestore(self, firestore_emoji: Dict[str, Any]) -> bool:
-        """Save a single emoji to Firestore"""
-        try:
-            emoji_id = firestore_emoji["emojiID"]
-            
+    async def save_emojis_to_firestore(self, firestore_emojis: List[Dict[str, Any]]) -> bool:
+        """Save emojis to Firestore in one WriteBatch, throttled and retrying transient commit failures"""
+        batch = self.db.batch()
+        for firestore_emoji in firestore_emojis:
             doc_ref = (self.db
                       .collection("emojis")
                       .document(FIXED_USER_ID)
                       .collection("usersEmojis")
-                      .document(emoji_id))
-            
-            doc_ref.set(firestore_emoji)
-            
-            return True
-            
-        except Exception as e:
-            print(f"Error saving emoji {firestore_emoji.get('emojiID', 'unknown')} to Firestore: {str(e)}")
-            return False
+                      .document(firestore_emoji["emojiID"]))
+            batch.set(doc_ref, firestore_emoji)
+        
+        for attempt in range(1, MAX_COMMIT_ATTEMPTS + 1):
+            await self.write_throttle.acquire(len(firestore_emojis))
+            try:
+                await asyncio.to_thread(batch.commit)
+                self.write_throttle.record_success()
+                return True
+                
+            except (Aborted, DeadlineExceeded, ResourceExhausted, ServiceUnavailable) as e:
+                self.write_throttle.record_contention()
+                if attempt == MAX_COMMIT_ATTEMPTS:
+                    logger.error("Error saving %d emojis to Firestore: %s", len(firestore_emojis), e)
+                    return False
+                delay = 2 ** (attempt - 1)
+                logger.warning("Commit attempt %d failed (%s), retrying in %ds...", attempt, e, delay)
+                await asyncio.sleep(delay)
+                
+            except Exception as e:
+                logger.error("Error saving %d emojis to Firestore: %s", len(firestore_emojis), e)
+                return False
     
-    async def migrate_emojis_batch(self, emojis: List[Dict[str, Any]], batch_size: int = 50) -> Dict[str, int]:
-        """Migrate emojis in batches with progress tracking"""
+    async def migrate_emojis_batch(self, emojis: List[Dict[str, Any]], batch_size: int = 400) -> Dict[str, int]:
+        """
+        Migrate emojis with progress tracking
+
+        Categorization workers feed converted emojis through a queue to a single
+        writer that commits them in batches of batch_size, so Gemini calls and
+        Firestore commits overlap instead of alternating.
+        """
         total_emojis = len(emojis)
         successful_migrations = 0
         failed_migrations = 0
         
-        print(f"\n Starting migration of {total_emojis} emojis in batches of {batch_size}")
-        print("=" * 60)
+        logger.info("Starting migration of %d emojis in batches of %d", total_emojis, batch_size)
+        logger.info("=" * 60)
         
-        for i in range(0, total_emojis, batch_size):
-            batch_end = min(i + batch_size, total_emojis)
-            batch_emojis = emojis[i:batch_end]
-            batch_num = (i // batch_size) + 1
-            
-            print(f"\n Processing batch {batch_num} ({i + 1}-{batch_end} of {total_emojis})...")
-            
-            batch_successful = 0
-            batch_failed = 0
-            
-            for j, json_emoji in enumerate(batch_emojis):
+        size_default_executor(CATEGORIZE_CONCURRENCY)
+        
+        queue: asyncio.Queue = asyncio.Queue(maxsize=batch_size * 2)
+        pending = enumerate(emojis, start=1)
+        
+        async def produce():
+            nonlocal failed_migrations
+            for position, json_emoji in pending:
                 try:
-                    emoji_name = json_emoji.get('name', 'Unknown')[:30]
-                    print(f"   [{i + j + 1:4d}/{total_emojis}] Processing: {emoji_name}...")
-                    
                     firestore_emoji = await self.create_firestore_emoji(json_emoji)
-                    
-                    success = await self.save_emoji_to_firestore(firestore_emoji)
-                    
-                    if success:
-                        batch_successful += 1
-                        print(f"Saved as '{firestore_emoji['category']}' category")
-                    else:
-                        batch_failed += 1
-                        
                 except Exception as e:
-                    batch_failed += 1
-                    print(f"Failed to process emoji: {str(e)}")
+                    failed_migrations += 1
+                    logger.warning("[%4d/%d] Failed to process emoji: %s", position, total_emojis, e)
                     continue
+                
+                logger.debug("[%4d/%d] %s: categorized as '%s'", position, total_emojis, firestore_emoji['prompt'][:30], firestore_emoji['category'])
+                await queue.put(firestore_emoji)
+        
+        async def commit(batch_num: int, firestore_emojis: List[Dict[str, Any]]):
+            nonlocal successful_migrations, failed_migrations
+            if await self.save_emojis_to_firestore(firestore_emojis):
+                successful_migrations += len(firestore_emojis)
+                logger.info("Batch %d committed: %d emojis", batch_num, len(firestore_emojis))
+            else:
+                failed_migrations += len(firestore_emojis)
+                logger.info("Batch %d failed: %d emojis", batch_num, len(firestore_emojis))
+        
+        async def consume():
+            batch_num = 0
+            firestore_emojis = []
+            while (firestore_emoji := await queue.get()) is not None:
+                firestore_emojis.append(firestore_emoji)
+                if len(firestore_emojis) == batch_size:
+                    batch_num += 1
+                    await commit(batch_num, firestore_emojis)
+                    firestore_emojis = []
             
-            successful_migrations += batch_successful
-            failed_migrations += batch_failed
-            
-            print(f"Batch {batch_num} completed: {batch_successful} successful, {batch_failed} failed")
-            
-            if batch_end < total_emojis:
-                await asyncio.sleep(1)
+            if firestore_emojis:
+                await commit(batch_num + 1, firestore_emojis)
+        
+        async def produce_all():
+            try:
+                await asyncio.gather(*(produce() for _ in range(CATEGORIZE_CONCURRENCY)))
+            finally:
+                await queue.put(None)
+        
+        await asyncio.gather(produce_all(), consume())
         
         return {
             "total": total_emojis,
@@ -185,49 +245,47 @@ class EmojiMigrationService:
 async def migrate_emojis():
     """Main migration function"""
     try:
-        print("Starting Emoji Migration to Firestore")
-        print("=" * 50)
+        logger.info("Starting Emoji Migration to Firestore")
+        logger.info("=" * 50)
         
-        print("Initializing Firebase...")
+        logger.info("Initializing Firebase...")
         initialize_firebase()
-        print("Firebase initialized successfully")
+        logger.info("Firebase initialized successfully")
         
         migration_service = EmojiMigrationService()
         
         json_file_path = project_root / "scripts" / "data" / "emojis.json"
-        print(f"\nLoading emojis from {json_file_path}...")
+        logger.info("Loading emojis from %s...", json_file_path)
         emojis = migration_service.load_emojis_from_json(str(json_file_path))
         
         if not emojis:
-            print("No emojis found in JSON file")
+            logger.info("No emojis found in JSON file")
             return
         
-        print(f"\nTarget user ID: {FIXED_USER_ID}")
-        print(f"Default values: downloadCount={DEFAULT_DOWNLOAD_COUNT}, visibility='{DEFAULT_VISIBILITY}'")
+        logger.info("Target user ID: %s", FIXED_USER_ID)
+        logger.info("Default values: downloadCount=%d, visibility='%s'", DEFAULT_DOWNLOAD_COUNT, DEFAULT_VISIBILITY)
         
         results = await migration_service.migrate_emojis_batch(emojis)
         
-        print("\n" + "=" * 60)
-        print("Migration Summary:")
-        print(f"   • Total emojis processed: {results['total']}")
-        print(f"   • Successfully migrated: {results['successful']}")
-        print(f"   • Failed migrations: {results['failed']}")
-        print(f"   • Success rate: {(results['successful'] / results['total'] * 100):.1f}%")
+        logger.info("=" * 60)
+        logger.info("Migration Summary:")
+        logger.info("   • Total emojis processed: %d", results['total'])
+        logger.info("   • Successfully migrated: %d", results['successful'])
+        logger.info("   • Failed migrations: %d", results['failed'])
+        logger.info("   • Success rate: %.1f%%", results['successful'] / results['total'] * 100)
         
         if results['successful'] > 0:
-            print(f"\nSuccessfully migrated {results['successful']} emojis to Firestore!")
-            print(f"Location: emojis/{FIXED_USER_ID}/usersEmojis/")
+            logger.info("Successfully migrated %d emojis to Firestore!", results['successful'])
+            logger.info("Location: emojis/%s/usersEmojis/", FIXED_USER_ID)
         
         if results['failed'] > 0:
-            print(f"\n{results['failed']} emojis failed to migrate. Check logs above for details.")
+            logger.warning("%d emojis failed to migrate. Check logs above for details.", results['failed'])
             
     except KeyboardInterrupt:
-        print("\nMigration interrupted by user")
+        logger.warning("Migration interrupted by user")
         sys.exit(1)
     except Exception as e:
-        print(f"\nMigration failed with error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Migration failed with error: %s", e)
         sys.exit(1)
 
 async def main():
@@ -265,5 +323,5 @@ if __name__ == "__main__":
         print("   Please set GEMINI_API_KEY environment variable")
         sys.exit(1)
     
-    
+    configure_script_logging()
     asyncio.run(main())
\ No newline at end of file
@@ -1,9 +1,11 @@
 import os
 import sys
-import json
 import asyncio
+import argparse
 from pathlib import Path
 from dotenv import load_dotenv
+import orjson
+from pydantic import TypeAdapter, ValidationError
 
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
@@ -13,57 +15,87 @@ load_dotenv()
 from app.firebase_config import initialize_firebase
 from app.services.pack_migration_service import PackMigrationService
 from app.models import PackMigrationData
+from scripts.logging_config import configure_script_logging
 
 USER_ID = "gs8uhH0QtpfHDQgTa2YXf2Zdb9K2"
 
 JSON_FILE_PATH = project_root / "scripts" / "data" / "packs_test.json"
 
+PACK_LIST_ADAPTER = TypeAdapter(list[PackMigrationData])
+
 async def load_pack_data() -> list[PackMigrationData]:
     if not JSON_FILE_PATH.exists():
         raise FileNotFoundError(f"JSON file not found: {JSON_FILE_PATH}")
     
     print(f"Loading pack data from: {JSON_FILE_PATH}")
     
-    with open(JSON_FILE_PATH, 'r') as file:
-        raw_data = json.load(file)
-    
-    pack_data = []
-    for item in raw_data:
-        try:
-            pack_data.append(PackMigrationData(**item))
-        except Exception as e:
-            print(f"Invalid pack data: {item.get('name', 'Unknown')} - {e}")
+    # Reading and validating the file is blocking work, keep it off the event loop
+    pack_data = await asyncio.to_thread(parse_pack_data)
     
     print(f"Loaded {len(pack_data)} packs")
     return pack_data
 
-async def main():
+def parse_pack_data() -> list[PackMigrationData]:
+    raw_data = orjson.loads(JSON_FILE_PATH.read_bytes())
+    
+    try:
+        pack_data = PACK_LIST_ADAPTER.validate_python(raw_data)
+    except ValidationError as e:
+        # Report and skip only the packs the errors point at, then validate the rest
+        invalid: dict[int, list[str]] = {}
+        for error in e.errors():
+            if not error["loc"]:
+                raise
+            index, *field = error["loc"]
+            invalid.setdefault(index, []).append(f"{'.'.join(map(str, field)) or 'item'}: {error['msg']}")
+        
+        for index, messages in invalid.items():
+            item = raw_data[index]
+            name = item.get('name', 'Unknown') if isinstance(item, dict) else 'Unknown'
+            print(f"Invalid pack data: {name} - {'; '.join(messages)}")
+        
+        pack_data = PACK_LIST_ADAPTER.validate_python(
+            [item for index, item in enumerate(raw_data) if index not in invalid]
+        )
+    
+    first_by_id: dict[int, PackMigrationData] = {}
+    for pack in pack_data:
+        first_by_id.setdefault(pack.id, pack)
+    unique_packs = list(first_by_id.values())
+    if len(unique_packs) < len(pack_data):
+        print(f"Skipping {len(pack_data) - len(unique_packs)} duplicate packs (same original pack ID)")
+    
+    return unique_packs
+
+async def main(assume_yes: bool = False):
     try:
         print("Starting Pack Migration to Firestore")
         print("=" * 50)
         
-        print("Initializing Firebase...")
-        initialize_firebase()
-        print("Firebase initialized successfully")
-        
         pack_data = await load_pack_data()
         
         if not pack_data:
             print("No valid pack data found. Exiting.")
             return
         
-        migration_service = PackMigrationService()
-        
         print(f"\nMigration Summary:")
         print(f"   • Source file: {JSON_FILE_PATH}")
         print(f"   • Target user ID: {USER_ID}")
         print(f"   • Number of packs: {len(pack_data)}")
         print(f"   • Firestore structure: packs/{USER_ID}/userPacks/{{auto_id}}")
         
-        response = input("\nDo you want to proceed with the migration? (y/N): ")
-        if response.lower() not in ['y', 'yes']:
-            print("Migration cancelled by user")
-            return
+        if not assume_yes and sys.stdin.isatty():
+            response = input("\nDo you want to proceed with the migration? (y/N): ")
+            if response.lower() not in ['y', 'yes']:
+                print("Migration cancelled by user")
+                return
+        
+        # Connect only once confirmed, so the client is not left idle at the prompt
+        print("\nInitializing Firebase...")
+        initialize_firebase()
+        print("Firebase initialized successfully")
+        
+        migration_service = PackMigrationService()
         
         print("\nStarting migration...")
         migrated_ids = await migration_service.migrate_packs_from_json(pack_data, USER_ID)
@@ -90,6 +122,10 @@ async def main():
         sys.exit(1)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate packs from JSON to Firestore")
+    parser.add_argument("-y", "--yes", action="store_true", help="Migrate without asking for confirmation")
+    args = parser.parse_args()
+    
     if not os.getenv("FIREBASE_CREDENTIALS_JSON") and not os.getenv("FIREBASE_CREDENTIALS_PATH"):
         print("Error: Firebase credentials not configured")
         print("   Please set either:")
@@ -97,4 +133,5 @@ if __name__ == "__main__":
         print("   2. FIREBASE_CREDENTIALS_PATH environment variable pointing to your serviceAccountKey.json file")
         sys.exit(1)
     
-    asyncio.run(main())
\ No newline at end of file
+    configure_script_logging()
+    asyncio.run(main(assume_yes=args.yes))
\ No newline at end of file
@@ -0,0 +1,40 @@
+"""
+Adaptive pacing for Firestore batch commits
+"""
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Firestore's ramp-up guidance: start at 500 writes/s and grow by half from there
+INITIAL_WRITE_RATE = 500.0
+MIN_WRITE_RATE = 50.0
+MAX_WRITE_RATE = 10000.0
+RAMP_UP_COMMITS = 5
+
+class WriteThrottle:
+    """Paces batch commits to a writes-per-second rate that halves on contention and ramps back up"""
+    
+    def __init__(self, rate: float = INITIAL_WRITE_RATE):
+        self.rate = rate
+        self._next_slot = 0.0
+        self._successes = 0
+    
+    async def acquire(self, writes: int):
+        """Wait until the given number of writes fits in the current rate"""
+        now = time.monotonic()
+        start = max(now, self._next_slot)
+        self._next_slot = start + writes / self.rate
+        if start > now:
+            await asyncio.sleep(start - now)
+    
+    def record_success(self):
+        self._successes += 1
+        if self._successes % RAMP_UP_COMMITS == 0:
+            self.rate = min(self.rate * 1.5, MAX_WRITE_RATE)
+    
+    def record_contention(self):
+        self._successes = 0
+        self.rate = max(self.rate / 2, MIN_WRITE_RATE)
+        logger.warning("Firestore is pushing back, lowering write rate to %.0f/s", self.rate)